@@ -4,14 +4,15 @@ FIMpad — Tabbed Tkinter editor for llama-server
 with FIM streaming, dirty tracking, and enchant-based spellcheck.
 """
 
+import bisect
 import contextlib
 import json
 import os
 import queue
 import re
-import subprocess
 import sys
 import threading
+from typing import TYPE_CHECKING
 
 try:
     import tkinter as tk
@@ -21,10 +22,8 @@ except ModuleNotFoundError:
         "On Ubuntu/Mint: sudo apt install python3-tk"
     ) from None
 import tkinter.font as tkfont
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from datetime import datetime
-from importlib import resources
-from importlib.resources.abc import Traversable
 from tkinter import colorchooser, messagebox, simpledialog, ttk
 
 try:
@@ -52,6 +51,7 @@ except ImportError:  # pragma: no cover - handled by runtime stubs in tests
 
     enchant = _EnchantStub()
 
+from . import aspell
 from .bol_utils import (
     _deindent_block,
     _delete_leading_chars,
@@ -73,9 +73,9 @@ from .parser import (
     TagParseError,
     TagToken,
     _parse_tag,
+    _tokenize,
     cursor_within_span,
     parse_fim_request,
-    parse_triple_tokens,
 )
 from .stream_utils import find_stream_match
 from .ui.file_dialogs import FileDialogAdapter, FileDialogController
@@ -88,6 +88,9 @@ from .ui.helpers import (
 from .ui.menus import AppMenus
 from .utils import offset_to_tkindex
 
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
+
 CORE_TK_FONT_NAMES: tuple[str, ...] = (
     "TkDefaultFont",
     "TkTextFont",
@@ -121,6 +124,58 @@ def _cursor_offset_from_text_widget(text_widget) -> int | None:
         return None
 
 
+def _tk_index_key(index: object) -> tuple[int, int]:
+    """Split a ``line.char`` Tk index into integers for ordered comparison."""
+
+    line, _, col = str(index).partition(".")
+    return int(line), int(col)
+
+
+class _DaemonWorkers:
+    """A fixed set of daemon threads running submitted callables in order.
+
+    ``ThreadPoolExecutor`` joins its workers at interpreter exit, so a stream
+    blocked on a busy server would keep the process alive after the window
+    closes. Daemon threads are simply abandoned instead.
+    """
+
+    def __init__(self, count: int, name: str) -> None:
+        self._count = count
+        self._tasks: queue.Queue[tuple[Callable[..., object], tuple] | None] = queue.Queue()
+        for i in range(count):
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, fn: Callable[..., object], *args: object) -> None:
+        self._tasks.put((fn, args))
+
+    def shutdown(self) -> None:
+        """Drop jobs that have not started and let idle workers exit.
+
+        Running jobs are not waited for; their daemon threads end with the process.
+        """
+
+        with contextlib.suppress(queue.Empty):
+            while True:
+                self._tasks.get_nowait()
+        for _ in range(self._count):
+            self._tasks.put(None)
+
+    def _run(self) -> None:
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            fn, args = task
+            try:
+                fn(*args)
+            except Exception:
+                # Report it as an uncaught thread error would be, then keep
+                # serving later jobs.
+                threading.excepthook(
+                    threading.ExceptHookArgs((*sys.exc_info(), threading.current_thread()))
+                )
+
+
 class FIMPad(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -156,6 +211,10 @@ class FIMPad(tk.Tk):
 
         self._result_queue = queue.Queue()
         self.after(60, self._poll_queue)
+        # Long-lived workers for streaming requests and spellchecks, so rapid
+        # completions or typing reuse threads instead of spawning new ones.
+        self._net_pool = _DaemonWorkers(2, "fim")
+        self._spell_pool = _DaemonWorkers(1, "spell")
 
         self._spell_notice_msg: str | None = None
         self._spell_notice_last: str | None = None
@@ -766,6 +825,7 @@ class FIMPad(tk.Tk):
             "dirty": False,
             "suppress_modified": False,
             "_spell_timer": None,
+            "_spell_ranges": None,
             "stream_buffer": [],
             "stream_flush_job": None,
             "stream_mark": None,
@@ -775,6 +835,7 @@ class FIMPad(tk.Tk):
             "_stream_follow_job": None,
             "_pending_follow_mark": None,
             "stream_patterns": [],
+            "_has_stream_patterns": False,
             "stream_accumulated": "",
             "stream_cancelled": False,
             "stream_stop_event": None,
@@ -824,6 +885,8 @@ class FIMPad(tk.Tk):
         text.bind("<Control-End>", self._on_ctrl_end_key)
 
         def on_modified(event=None):
+            # Edits shift tag indices, so the cached misspelling ranges are stale.
+            st["_spell_ranges"] = None
             if st["suppress_modified"] or st.get("is_log_tab"):
                 text.edit_modified(False)
             elif text.edit_modified():
@@ -1544,6 +1607,7 @@ class FIMPad(tk.Tk):
                         self.after_cancel(timer_id)
                     st["_spell_timer"] = None
                 st["text"].tag_remove("misspelled", "1.0", "end")
+                st["_spell_ranges"] = None
             self._spell_notice_msg = None
             return
 
@@ -1644,10 +1708,15 @@ class FIMPad(tk.Tk):
 
     # ---------- Library ----------
 
-    def _open_library_resource(self, title: str, resource: Traversable) -> None:
+    def _open_library_resource(self, title: str, resource: "Traversable") -> None:
         try:
-            with resources.as_file(resource) as path, open(path, encoding="utf-8") as f:
-                content = f.read()
+            # Library entries are concrete paths once scanned, so read them
+            # directly instead of materializing each one through ``as_file``;
+            # a single bytes decode skips the TextIOWrapper read_text builds.
+            content = resource.read_bytes().decode("utf-8")
+            if "\r" in content:
+                # Text mode translated newlines; keep \r out of the Tk buffer.
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
         except Exception as exc:
             self._show_error(
                 "Library Error", "Could not load the library file.", detail=f"{title}: {exc}"
@@ -3195,7 +3264,7 @@ class FIMPad(tk.Tk):
             prev_line_pad = self.cfg.get(
                 "line_number_padding_px", DEFAULTS["line_number_padding_px"]
             )
-            new_cfg = DEFAULTS.copy()
+            new_cfg = dict(DEFAULTS)
             self._spell_lang = new_cfg.get("spell_lang", DEFAULTS.get("spell_lang", "en_US"))
             self._apply_config_changes(
                 new_cfg, prev_pad=prev_pad, prev_line_pad=prev_line_pad
@@ -3286,6 +3355,7 @@ class FIMPad(tk.Tk):
                         self.after_cancel(timer_id)
                     st["_spell_timer"] = None
                 t.tag_remove("misspelled", "1.0", "end")
+                st["_spell_ranges"] = None
             else:
                 self._schedule_spellcheck_for_frame(frame, delay_ms=200)
 
@@ -3339,7 +3409,9 @@ class FIMPad(tk.Tk):
             "log_entries_kept": "log_entries_kept",
         }
 
-    def _normalize_config_tag_settings(self, settings: dict[str, object]) -> dict[str, object]:
+    def _normalize_config_tag_settings(
+        self, settings: Mapping[str, object]
+    ) -> dict[str, object]:
         supported_keys = self._config_tag_supported_keys()
 
         alias_map = {k.casefold(): k for k in supported_keys}
@@ -3486,7 +3558,7 @@ class FIMPad(tk.Tk):
         cursor_offset = max(0, min(len(content), cursor_offset))
 
         try:
-            tokens = list(parse_triple_tokens(content))
+            tokens = _tokenize(content)
         except TagParseError as exc:
             self._highlight_tag_at_cursor(st, content=content, cursor_offset=cursor_offset)
             self._show_error("Config Tag", "Tag could not be parsed.", detail=str(exc))
@@ -3728,6 +3800,7 @@ class FIMPad(tk.Tk):
         st["_stream_follow_primed"] = False
         self._cancel_stream_follow_job(st)
         st["stream_patterns"] = []
+        st["_has_stream_patterns"] = False
         st["stream_accumulated"] = ""
         st["stream_cancelled"] = False
         st["post_actions"] = []
@@ -3758,19 +3831,21 @@ class FIMPad(tk.Tk):
         st["_stream_prev_autoseparators"] = None
 
     def _find_active_tag(self, tokens, cursor_offset: int) -> TagToken | None:
-        marker_token: TagToken | None = None
-        for token in tokens:
-            if not isinstance(token, TagToken):
-                continue
-            if not cursor_within_span(token.start, token.end, cursor_offset):
-                continue
-            if marker_token is None or token.start >= marker_token.start:
-                marker_token = token
-        return marker_token
+        # Tokens tile the document in order, so only the last token starting
+        # before the cursor can contain it; if that is text, no tag does.
+        k = bisect.bisect_left(tokens, cursor_offset, key=lambda token: token.start) - 1
+        if k < 0:
+            return None
+        token = tokens[k]
+        if not isinstance(token, TagToken):
+            return None
+        if not cursor_within_span(token.start, token.end, cursor_offset):
+            return None
+        return token
 
     def _caret_within_tag(self, content: str, cursor_offset: int) -> bool:
         try:
-            tokens = list(parse_triple_tokens(content))
+            tokens = _tokenize(content)
         except TagParseError:
             tokens = None
 
@@ -3886,7 +3961,7 @@ class FIMPad(tk.Tk):
         cursor_offset = max(0, min(len(content), cursor_offset))
 
         try:
-            tokens = list(parse_triple_tokens(content))
+            tokens = _tokenize(content)
         except TagParseError as exc:
             self._highlight_tag_at_cursor(st, content=content, cursor_offset=cursor_offset)
             self._show_unsupported_fim_error(exc)
@@ -3916,7 +3991,6 @@ class FIMPad(tk.Tk):
             fim_request = parse_fim_request(
                 content,
                 cursor_offset,
-                tokens=tokens,
                 marker_token=marker_token,
                 force_completion=self._fim_tokens_missing(),
             )
@@ -3953,6 +4027,7 @@ class FIMPad(tk.Tk):
 
         st["stream_cancelled"] = True
         st["stream_patterns"] = []
+        st["_has_stream_patterns"] = False
         st["stream_accumulated"] = ""
         st["post_actions"] = []
 
@@ -4134,6 +4209,8 @@ class FIMPad(tk.Tk):
             ] + [
                 {"text": patt, "action": "chop"} for patt in fim_request.chop_patterns
             ]
+            # Cached so the per-token poll loop can skip stop/chop matching outright.
+            st["_has_stream_patterns"] = bool(st["stream_patterns"])
             st["stream_accumulated"] = ""
             st["stream_cancelled"] = False
             st["stream_stop_event"] = threading.Event()
@@ -4196,19 +4273,12 @@ class FIMPad(tk.Tk):
                         {"ok": False, "error": str(e), "tab": tab_id}
                     )
                 finally:
-                    # Always emit done; then kick spellcheck
+                    # Always emit end-of-stream; the handler also kicks spellcheck
                     self._result_queue.put(
-                        {"ok": True, "kind": "stream_done", "tab": tab_id}
-                    )
-                    self._result_queue.put(
-                        {"ok": True, "kind": "spellcheck_now", "tab": tab_id}
+                        {"ok": True, "kind": "stream_end", "tab": tab_id}
                     )
 
-            threading.Thread(
-                target=worker,
-                args=(self._active_stream_tab_id, st["stream_stop_event"]),
-                daemon=True,
-            ).start()
+            self._net_pool.submit(worker, self._active_stream_tab_id, st["stream_stop_event"])
         except Exception as exc:
             self._fim_generation_active = False
             self._set_busy(False)
@@ -4279,7 +4349,7 @@ class FIMPad(tk.Tk):
                         with contextlib.suppress(tk.TclError):
                             frame = self.nametowidget(tab_id)
                     if not frame or frame not in self.tabs:
-                        if kind == "stream_done":
+                        if kind in ("stream_done", "stream_end"):
                             self._fim_generation_active = False
                             self._set_busy(False)
                             self._active_stream_tab_id = None
@@ -4296,75 +4366,77 @@ class FIMPad(tk.Tk):
                         mark = item["mark"]
                         piece = item["text"]
 
-                        if not item.get("allow_stream_cancelled"):
-                            patterns = st.get("stream_patterns", [])
+                        if st.get("_has_stream_patterns") and not item.get(
+                            "allow_stream_cancelled"
+                        ):
+                            patterns = st["stream_patterns"]
                             buffered = "".join(st.get("stream_buffer", []))
                             accumulated = st.get("stream_accumulated", "")
-                            if patterns:
-                                candidate = f"{accumulated}{buffered}{piece}"
-                                match = find_stream_match(candidate, patterns)
-
-                                if match is not None:
-                                    target_text = (
-                                        candidate[: match.match_index]
-                                        if match.action == "chop"
-                                        else candidate[: match.end_index]
-                                    )
-
-                                    removed_count = 0
-                                    if (
-                                        match.action == "chop"
-                                        and len(target_text) < len(accumulated)
-                                    ):
-                                        removed_count = len(accumulated) - len(target_text)
-
-                                        flush_mark = st.get("stream_mark") or mark or "stream_here"
-
-                                        try:
-                                            end_idx = text.index(flush_mark)
-                                            start_idx = text.index(f"{end_idx}-{removed_count}c")
-                                            text.delete(start_idx, end_idx)
-                                        except tk.TclError:
-                                            pass
-
-                                        accumulated = target_text
-
-                                    pending_insert = target_text[len(accumulated) :]
-                                    if pending_insert:
-                                        st["stream_buffer"] = [pending_insert]
-                                    else:
-                                        st["stream_buffer"].clear()
-                                    st["stream_mark"] = mark
-                                    flush_mark = st.get("stream_mark") or "stream_here"
-                                    self._force_flush_stream_buffer(frame, flush_mark)
-                                    st["stream_cancelled"] = True
-                                    st["stream_patterns"] = []
-                                    st["stream_accumulated"] = target_text
-                                    stop_event = st.get("stream_stop_event")
-                                    if stop_event is not None:
-                                        stop_event.set()
-                                    self._result_queue.put(
-                                        {"ok": True, "kind": "stream_done", "tab": tab_id}
-                                    )
-                                    self._result_queue.put(
-                                        {"ok": True, "kind": "spellcheck_now", "tab": tab_id}
-                                    )
-                                    continue
+                            candidate = f"{accumulated}{buffered}{piece}"
+                            match = find_stream_match(candidate, patterns)
+
+                            if match is not None:
+                                target_text = (
+                                    candidate[: match.match_index]
+                                    if match.action == "chop"
+                                    else candidate[: match.end_index]
+                                )
+
+                                removed_count = 0
+                                if (
+                                    match.action == "chop"
+                                    and len(target_text) < len(accumulated)
+                                ):
+                                    removed_count = len(accumulated) - len(target_text)
+
+                                    flush_mark = st.get("stream_mark") or mark or "stream_here"
+
+                                    try:
+                                        end_idx = text.index(flush_mark)
+                                        start_idx = text.index(f"{end_idx}-{removed_count}c")
+                                        text.delete(start_idx, end_idx)
+                                    except tk.TclError:
+                                        pass
+
+                                    accumulated = target_text
+
+                                pending_insert = target_text[len(accumulated) :]
+                                if pending_insert:
+                                    st["stream_buffer"] = [pending_insert]
+                                else:
+                                    st["stream_buffer"].clear()
+                                st["stream_mark"] = mark
+                                flush_mark = st.get("stream_mark") or "stream_here"
+                                self._force_flush_stream_buffer(frame, flush_mark)
+                                st["stream_cancelled"] = True
+                                st["stream_patterns"] = []
+                                st["_has_stream_patterns"] = False
+                                st["stream_accumulated"] = target_text
+                                stop_event = st.get("stream_stop_event")
+                                if stop_event is not None:
+                                    stop_event.set()
+                                self._result_queue.put(
+                                    {"ok": True, "kind": "stream_end", "tab": tab_id}
+                                )
+                                continue
 
                             st["stream_buffer"] = [buffered + piece]
-                            st["stream_accumulated"] = accumulated
-                        else:
+                        elif item.get("allow_stream_cancelled"):
                             st["stream_buffer"].append(piece)
                             st["stream_accumulated"] = st.get("stream_accumulated", "") + piece
+                        else:
+                            # No stop/chop patterns: nothing to match, just buffer.
+                            st["stream_buffer"].append(piece)
 
                         st["stream_mark"] = mark
                         self._schedule_stream_flush(frame, mark)
 
-                    elif kind == "stream_done":
+                    elif kind in ("stream_done", "stream_end"):
                         mark = st.get("stream_mark") or item.get("mark") or "stream_here"
                         self._force_flush_stream_buffer(frame, mark)
                         generated_text = st.get("stream_accumulated", "")
                         st["stream_patterns"] = []
+                        st["_has_stream_patterns"] = False
                         fim_request = st.pop("active_fim_request", None)
                         if fim_request:
                             self._log_fim_generation(fim_request, generated_text)
@@ -4385,12 +4457,12 @@ class FIMPad(tk.Tk):
                         self._finalize_stream_for_tab(frame, mark=mark)
                         self._active_stream_tab_id = None
                         self._set_dirty(st, True)
-
-                    elif kind == "spellcheck_now":
-                        self._schedule_spellcheck_for_frame(frame, delay_ms=150)
+                        if kind == "stream_end":
+                            self._schedule_spellcheck_for_frame(frame, delay_ms=150)
 
                     elif kind == "spell_result":
                         # Apply tag updates
+                        st["_spell_ranges"] = None
                         region = item.get("region")
                         with contextlib.suppress(tk.TclError):
                             if region:
@@ -4523,6 +4595,7 @@ class FIMPad(tk.Tk):
             if frame in self.tabs:
                 st = self.tabs[frame]
                 st["text"].tag_remove("misspelled", "1.0", "end")
+                st["_spell_ranges"] = None
                 st["_spell_timer"] = None
             return
 
@@ -4644,6 +4717,7 @@ class FIMPad(tk.Tk):
             if frame in self.tabs:
                 st = self.tabs[frame]
                 st["text"].tag_remove("misspelled", "1.0", "end")
+                st["_spell_ranges"] = None
                 st["_spell_timer"] = None
             return
         if not dictionary:
@@ -4723,18 +4797,10 @@ class FIMPad(tk.Tk):
                 if not dict_obj:
                     lang = self._spell_lang
                     try:
-                        proc = subprocess.run(  # noqa: UP022 - keep stdout/stderr for monkeypatch compat
-                            ["aspell", "list", "-l", lang, "--encoding=utf-8"],
-                            input="\n".join(words).encode("utf-8"),
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            check=False,
-                        )
-                        miss_raw = proc.stdout.decode("utf-8", errors="ignore").splitlines()
+                        miss = aspell.shared_pipe(lang).misspelled(words)
                     except Exception:
-                        miss_raw = []
+                        miss = set()
 
-                    miss = set(miss_raw) & set(words)
                     miss = {w for w in miss if w not in ignore_set}
 
                     if not miss:
@@ -4767,19 +4833,16 @@ class FIMPad(tk.Tk):
                         break
             tab_id = tab_id or str(frame)
 
-        threading.Thread(
-            target=worker,
-            args=(
-                tab_id,
-                txt,
-                ignore,
-                dictionary,
-                base_line,
-                base_col,
-                region,
-            ),
-            daemon=True,
-        ).start()
+        self._spell_pool.submit(
+            worker,
+            tab_id,
+            txt,
+            ignore,
+            dictionary,
+            base_line,
+            base_col,
+            region,
+        )
 
     def _spell_context_menu(self, event, frame):
         if not self.cfg.get("spellcheck_enabled", True) or not self._dictionary:
@@ -4796,13 +4859,12 @@ class FIMPad(tk.Tk):
 
         # Find the misspelled tag range that contains idx_inside
         hit_start = hit_end = None
-        ranges = list(
-            zip(t.tag_ranges("misspelled")[0::2], t.tag_ranges("misspelled")[1::2], strict=False)
-        )
-        for s, e in ranges:
-            if t.compare(idx_inside, ">=", s) and t.compare(idx_inside, "<", e):
+        starts, ranges = self._spell_ranges(st)
+        pos = bisect.bisect_right(starts, _tk_index_key(idx_inside)) - 1
+        if pos >= 0:
+            s, e = ranges[pos]
+            if t.compare(idx_inside, "<", e):
                 hit_start, hit_end = s, e
-                break
         if not hit_start:
             return  # not on a misspelled word
 
@@ -4864,6 +4926,22 @@ class FIMPad(tk.Tk):
         finally:
             menu.grab_release()
 
+    @staticmethod
+    def _spell_ranges(st: dict) -> tuple[list[tuple[int, int]], list[tuple[str, str]]]:
+        """Return sorted misspelling start keys and ranges, cached per tab.
+
+        The cache is cleared whenever spell results are applied or the text is
+        edited, so lookups only hit Tk again after the tags have changed.
+        """
+
+        cached = st.get("_spell_ranges")
+        if cached is None:
+            flat = st["text"].tag_ranges("misspelled")
+            ranges = [(str(s), str(e)) for s, e in zip(flat[0::2], flat[1::2], strict=False)]
+            cached = ([_tk_index_key(s) for s, _e in ranges], ranges)
+            st["_spell_ranges"] = cached
+        return cached
+
     def _ignore_word_session(self, word):
         self._spell_ignore.add(word)
         # re-run spellcheck on current tab
@@ -4903,6 +4981,9 @@ class FIMPad(tk.Tk):
             if st.get("stream_stop_event") is not None:
                 self._interrupt_stream_for_tab(frame)
         self._persist_config()
+        self._net_pool.shutdown()
+        self._spell_pool.shutdown()
+        aspell.close_shared_pipe()
         self.destroy()
 
 
@@ -0,0 +1,141 @@
+"""Persistent ``aspell`` pipe used as a spellcheck fallback.
+
+Spawning ``aspell list`` for every spellcheck pays fork/exec and dictionary
+loading each time. :class:`AspellPipe` keeps a single ``aspell -a`` process
+alive and streams words to it instead.
+"""
+from __future__ import annotations
+
+import contextlib
+import subprocess
+import threading
+from collections.abc import Iterable
+from typing import IO
+
+# Words are written in batches small enough to fit in the pipe buffer, so a
+# write never blocks while aspell waits for its own output to be read.
+_BATCH_BYTES = 4096
+
+
+class AspellPipe:
+    """A long-lived ``aspell -a`` process for one language.
+
+    Calls are serialized with a lock so spellcheck workers can share one
+    instance. Any I/O failure closes the process; the next call respawns it.
+    """
+
+    def __init__(self, lang: str) -> None:
+        self.lang = lang
+        self._lock = threading.Lock()
+        self._proc: subprocess.Popen[bytes] | None = None
+
+    def _spawn(self) -> subprocess.Popen[bytes]:
+        proc = subprocess.Popen(
+            ["aspell", "-a", "-l", self.lang, "--encoding=utf-8"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        assert proc.stdout is not None
+        # Discard the version banner printed on startup.
+        proc.stdout.readline()
+        return proc
+
+    def misspelled(self, words: Iterable[str]) -> set[str]:
+        """Return the subset of ``words`` that aspell does not recognize."""
+
+        miss: set[str] = set()
+        with self._lock:
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._proc = self._spawn()
+                stdin, stdout = self._proc.stdin, self._proc.stdout
+                assert stdin is not None and stdout is not None
+                batch: list[str] = []
+                lines: list[bytes] = []
+                size = 0
+                for word in set(words):
+                    # "^" stops aspell from treating the line as a command.
+                    line = f"^{word}\n".encode()
+                    batch.append(word)
+                    lines.append(line)
+                    size += len(line)
+                    if size >= _BATCH_BYTES:
+                        _check_batch(stdin, stdout, batch, lines, miss)
+                        batch, lines, size = [], [], 0
+                if batch:
+                    _check_batch(stdin, stdout, batch, lines, miss)
+            except Exception:
+                self._close_locked()
+                raise
+        return miss
+
+    def _close_locked(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            with contextlib.suppress(Exception):
+                proc.stdin.close()
+        with contextlib.suppress(Exception):
+            proc.kill()
+        with contextlib.suppress(Exception):
+            proc.wait(timeout=1)
+
+    def close(self) -> None:
+        """Stop the process without waiting for a spellcheck in progress."""
+
+        if self._lock.acquire(blocking=False):
+            try:
+                self._close_locked()
+            finally:
+                self._lock.release()
+            return
+        # A worker holds the lock mid-exchange; killing the process ends its
+        # blocking read, and it then cleans up under the lock itself.
+        proc = self._proc
+        if proc is not None:
+            with contextlib.suppress(Exception):
+                proc.kill()
+
+
+def _check_batch(
+    stdin: IO[bytes], stdout: IO[bytes], batch: list[str], lines: list[bytes], miss: set[str]
+) -> None:
+    stdin.write(b"".join(lines))
+    stdin.flush()
+    for word in batch:
+        # One result line per word aspell found, then a blank line.
+        while True:
+            line = stdout.readline()
+            if not line:
+                raise OSError("aspell exited unexpectedly")
+            if line in (b"\n", b"\r\n"):
+                break
+            if line[:1] in (b"&", b"#"):
+                miss.add(word)
+
+
+_shared: AspellPipe | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_pipe(lang: str) -> AspellPipe:
+    """Return the process-wide pipe for ``lang``, replacing one for another language."""
+
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared.lang != lang:
+            _shared.close()
+            _shared = None
+        if _shared is None:
+            _shared = AspellPipe(lang)
+        return _shared
+
+
+def close_shared_pipe() -> None:
+    global _shared
+    with _shared_lock:
+        if _shared is not None:
+            _shared.close()
+            _shared = None
@@ -1,22 +1,25 @@
-import re
 from collections.abc import Sequence
 
 
 def _leading_whitespace(text: str) -> str:
-    match = re.match(r"[ \t]*", text)
-    return match.group(0) if match else ""
+    return text[: len(text) - len(text.lstrip(" \t"))]
 
 
 def _leading_whitespace_style(lines: Sequence[str]) -> str | None:
-    prefixes = [_leading_whitespace(line) for line in lines]
-    non_empty = [prefix for prefix in prefixes if prefix]
-    if not non_empty:
-        return None
-    if all(set(prefix) <= {"\t"} for prefix in non_empty):
+    saw_tabs = saw_spaces = False
+    for line in lines:
+        prefix = _leading_whitespace(line)
+        if not prefix:
+            continue
+        saw_tabs = saw_tabs or "\t" in prefix
+        saw_spaces = saw_spaces or " " in prefix
+        if saw_tabs and saw_spaces:
+            return "mixed"
+    if saw_tabs:
         return "tabs"
-    if all(set(prefix) <= {" "} for prefix in non_empty):
+    if saw_spaces:
         return "spaces"
-    return "mixed"
+    return None
 
 
 def _indent_unit_for_lines(lines: Sequence[str], indent_size: int) -> str:
@@ -3,16 +3,46 @@ from __future__ import annotations
 
 import json
 import threading
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 
 import requests
 
 CONNECT_TIMEOUT = 10
 READ_TIMEOUT = 7200
 
+# Accessors for the response shapes we understand, in priority order: chat
+# deltas, chat messages, then plain completions (llama.cpp / vLLM).
+_PIECE_GETTERS: tuple[Callable[[dict], str], ...] = (
+    lambda chunk: chunk["choices"][0]["delta"]["content"],
+    lambda chunk: chunk["choices"][0]["message"]["content"],
+    lambda chunk: chunk["choices"][0]["text"],
+)
+
+
+def _extract_piece(chunk: dict) -> str:
+    ch0 = (chunk.get("choices") or [{}])[0]
+    return (
+        ch0.get("delta", {}).get("content", "")
+        or ch0.get("message", {}).get("content", "")
+        or ch0.get("text", "")
+    )
+
+
+def _detect_piece_getter(chunk: dict) -> Callable[[dict], str] | None:
+    """Return the accessor matching the shape of ``chunk``, if it has content."""
+
+    for getter in _PIECE_GETTERS:
+        try:
+            if getter(chunk):
+                return getter
+        except (KeyError, IndexError, TypeError, AttributeError):
+            continue
+    return None
+
 
 def _sse_chunks(resp, stop_event: threading.Event | None = None) -> Iterable[str]:
     # decode lines as UTF-8, accept "data:" with/without a space
+    getter: Callable[[dict], str] | None = None
     try:
         for raw in resp.iter_lines(decode_unicode=False):
             if stop_event is not None and stop_event.is_set():
@@ -33,12 +63,16 @@ def _sse_chunks(resp, stop_event: threading.Event | None = None) -> Iterable[str
                 chunk = json.loads(data_str)
             except Exception:
                 continue
-            ch0 = (chunk.get("choices") or [{}])[0]
-            piece = (
-                ch0.get("delta", {}).get("content", "")
-                or ch0.get("message", {}).get("content", "")
-                or ch0.get("text", "")
-            )
+            # Endpoints keep one response shape for a whole stream, so detect it
+            # on the first chunk with content and index it directly afterwards.
+            if getter is None:
+                getter = _detect_piece_getter(chunk)
+                piece = _extract_piece(chunk)
+            else:
+                try:
+                    piece = getter(chunk)
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    piece = _extract_piece(chunk)
             if piece:
                 yield piece
     except Exception:
@@ -2,18 +2,29 @@
 from __future__ import annotations
 
 import contextlib
+import hashlib
 import json
 import os
+import pathlib
 import re
+import sys
 import tempfile
 import time
+import types
+from collections.abc import Mapping
 
-APP_DIR = os.path.expanduser("~/.fimpad")
-CONFIG_PATH = os.path.join(APP_DIR, "config.json")
+orjson: types.ModuleType | None
+try:  # Optional: faster JSON parsing/serialization when installed.
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+APP_DIR = pathlib.Path("~/.fimpad").expanduser()
+CONFIG_PATH = APP_DIR / "config.json"
 
 SPELLCHECK_DEFAULT_LANG = "en_US"
 
-DEFAULTS = {
+_DEFAULTS = {
     "endpoint": "http://localhost:8080",
     "temperature": 0.85,
     "top_p": 0.95,
@@ -43,54 +54,121 @@ DEFAULTS = {
     "stream_follow_debounce_ms": 1000,
     "log_entries_kept": 10,
 }
+# Intern keys and string values so every config dict built from DEFAULTS shares them.
+# The read-only view catches accidental writes; use _default_copy() for a mutable dict.
+DEFAULTS: Mapping[str, object] = types.MappingProxyType(
+    {sys.intern(k): sys.intern(v) if isinstance(v, str) else v for k, v in _DEFAULTS.items()}
+)
 
 WORD_RE = re.compile(r"\b[^\W\d_]+(?:['’][^\W\d_]+)*\b", re.UNICODE)
 
+# Keys from older releases that are dropped from the config on load.
+_DEPRECATED_KEYS = frozenset({"model", "default_n"})
+
+# Last config read from or written to disk, keyed by path and file stat so an
+# unchanged file is not rewritten: (path, (mtime_ns, size), payload digest).
+_cache: tuple[pathlib.Path, tuple[int, int], bytes] | None = None
+# APP_DIR once it is known to exist, so mkdir is not repeated on every call.
+_created_dir: pathlib.Path | None = None
+
 
 class ConfigSaveError(Exception):
     """Raised when the configuration cannot be written to disk."""
 
 
+def _default_copy() -> dict:
+    return dict(DEFAULTS)
+
+
+def _loads(raw: bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(cfg: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(cfg, option=orjson.OPT_INDENT_2)
+    return json.dumps(cfg, indent=2).encode("utf-8")
+
+
+def _digest(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+
+def _ensure_app_dir() -> None:
+    global _created_dir
+    if _created_dir != APP_DIR:
+        APP_DIR.mkdir(parents=True, exist_ok=True)
+        _created_dir = APP_DIR
+
+
+def _stat_key(path: pathlib.Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
 def load_config() -> dict:
-    deprecated_keys = {"model", "default_n"}
+    global _cache
     try:
-        os.makedirs(APP_DIR, exist_ok=True)
-        if not os.path.exists(CONFIG_PATH):
-            save_config(DEFAULTS)
-            return DEFAULTS.copy()
-
-        with open(CONFIG_PATH, encoding="utf-8") as f:
-            raw_data = json.load(f)
+        _ensure_app_dir()
+        try:
+            stat_key = _stat_key(CONFIG_PATH)
+        except FileNotFoundError:
+            defaults = _default_copy()
+            save_config(defaults)
+            return defaults
+
+        payload = CONFIG_PATH.read_bytes()
+        raw_data = _loads(payload)
         if not isinstance(raw_data, dict):
             raise ValueError("Config file must contain a JSON object.")
-        data = raw_data
+        _cache = (CONFIG_PATH, stat_key, _digest(payload))
     except (json.JSONDecodeError, ValueError):
         _backup_corrupt_config()
-        save_config(DEFAULTS)
-        return DEFAULTS.copy()
+        defaults = _default_copy()
+        save_config(defaults)
+        return defaults
     except Exception:
-        return DEFAULTS.copy()
-
-    changed = False
-    for k in list(data):
-        if k in deprecated_keys:
-            data.pop(k, None)
-            changed = True
-    for k, v in DEFAULTS.items():
-        if k not in data:
-            data[k] = v
-            changed = True
+        return _default_copy()
+
+    stale = _DEPRECATED_KEYS & raw_data.keys()
+    for k in stale:
+        del raw_data[k]
+    kept = {sys.intern(k): v for k, v in raw_data.items()}
+    data = {**DEFAULTS, **kept}
+    # Changed if deprecated keys were dropped or any defaults were filled in.
+    changed = bool(stale) or len(data) != len(kept)
     if changed:
         save_config(data)
     return data
 
 
+def _on_disk(digest: bytes) -> bool:
+    """Return True if CONFIG_PATH is unchanged since it last held ``digest``."""
+
+    if _cache is None or _cache[0] != CONFIG_PATH or _cache[2] != digest:
+        return False
+    try:
+        return _stat_key(CONFIG_PATH) == _cache[1]
+    except OSError:
+        return False
+
+
 def save_config(cfg: dict) -> None:
-    os.makedirs(APP_DIR, exist_ok=True)
-    fd, tmp_path = tempfile.mkstemp(prefix="config.", suffix=".tmp", dir=APP_DIR)
+    global _cache
+    try:
+        payload = _dumps(cfg)
+    except Exception as exc:
+        raise ConfigSaveError(f"Failed to save config to {CONFIG_PATH}: {exc}") from exc
+    digest = _digest(payload)
+    if _on_disk(digest):
+        return
+
+    fd, tmp_path = _mkstemp_in_app_dir()
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
             f.flush()
             os.fsync(f.fileno())
         os.replace(tmp_path, CONFIG_PATH)
@@ -98,6 +176,20 @@ def save_config(cfg: dict) -> None:
         with contextlib.suppress(Exception):
             os.unlink(tmp_path)
         raise ConfigSaveError(f"Failed to save config to {CONFIG_PATH}: {exc}") from exc
+    with contextlib.suppress(OSError):
+        _cache = (CONFIG_PATH, _stat_key(CONFIG_PATH), digest)
+
+
+def _mkstemp_in_app_dir() -> tuple[int, str]:
+    global _created_dir
+    _ensure_app_dir()
+    try:
+        return tempfile.mkstemp(prefix="config.", suffix=".tmp", dir=APP_DIR)
+    except FileNotFoundError:
+        # APP_DIR was removed since it was created; make it again.
+        _created_dir = None
+        _ensure_app_dir()
+        return tempfile.mkstemp(prefix="config.", suffix=".tmp", dir=APP_DIR)
 
 
 def _backup_corrupt_config() -> None:
@@ -107,12 +199,12 @@ def _backup_corrupt_config() -> None:
     should not prevent the app from starting with default settings.
     """
 
-    if not os.path.exists(CONFIG_PATH):
+    if not CONFIG_PATH.exists():
         return
 
     ts = time.strftime("%Y%m%d-%H%M%S")
     ms = int(time.time() * 1000) % 1000
     backup_name = f"config.json.corrupt-{ts}-{ms:03d}"
-    backup_path = os.path.join(APP_DIR, backup_name)
+    backup_path = APP_DIR / backup_name
     with contextlib.suppress(Exception):
         os.replace(CONFIG_PATH, backup_path)
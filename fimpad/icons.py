@@ -1,6 +1,27 @@
-import platform
+import contextlib
+import sys
 import tkinter as tk
-from importlib import resources
+from collections.abc import Iterator
+from pathlib import Path
+
+# Icons ship next to this module; reading them directly skips the
+# importlib.resources lookup for regular (unzipped) installs.
+_RESOURCE_DIR = Path(__file__).resolve().parent / "resources"
+
+
+@contextlib.contextmanager
+def _icon_path(name: str) -> Iterator[Path]:
+    path = _RESOURCE_DIR / name
+    if path.is_file():
+        yield path
+        return
+    # Only the fallback needs the resources machinery, so import it lazily.
+    from importlib import resources
+
+    # Anchor on this package so the fimpad.resources subpackage is not imported.
+    target = resources.files(__package__) / "resources" / name
+    with resources.as_file(target) as resource_path:
+        yield resource_path
 
 
 def set_app_icon(root: tk.Tk) -> None:
@@ -12,16 +33,16 @@ def set_app_icon(root: tk.Tk) -> None:
     """
 
     try:
-        with resources.path("fimpad.resources", "fimpad.png") as png_path:
+        with _icon_path("fimpad.png") as png_path:
             root._fimpad_icon_png = tk.PhotoImage(file=png_path)
             root.iconphoto(True, root._fimpad_icon_png)
     except Exception:
         # Fail silently; FIMpad should still run without an icon
         pass
 
-    if platform.system() == "Windows":
+    if sys.platform == "win32":
         try:
-            with resources.path("fimpad.resources", "fimpad.ico") as ico_path:
+            with _icon_path("fimpad.ico") as ico_path:
                 root.iconbitmap(default=str(ico_path))
         except Exception:
             pass
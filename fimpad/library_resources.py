@@ -3,17 +3,27 @@
 Add new ``.txt`` or ``.md`` files to ``fimpad/library`` (optionally inside a
     single-level subdirectory) to have them bundled and discovered automatically.
 """
+from __future__ import annotations
 
+import atexit
 import contextlib
+import functools
+import operator
+import os
 import pathlib
 import sys
-from importlib import resources
-from importlib.resources.abc import Traversable
+import types
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
 
-_LIBRARY_EXTS = {".txt", ".md"}
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
 
+_LIBRARY_SUFFIXES = (".txt", ".md")
 
-def iter_library() -> dict[str | None, list[tuple[str, Traversable]]]:
+
+@functools.lru_cache(maxsize=1)
+def iter_library() -> Mapping[str | None, tuple[tuple[str, Traversable], ...]]:
     """Return bundled library files grouped by subdirectory.
 
     Library files are discovered under ``fimpad/library`` and include regular
@@ -22,38 +32,55 @@ def iter_library() -> dict[str | None, list[tuple[str, Traversable]]]:
     single-level subdirectory are grouped under that directory's name. Filenames
     are normalized to lowercase for sorting, and the returned title includes the
     file extension.
-    """
-
-    with contextlib.ExitStack() as stack:
-        library_dir = _resolve_library_dir(stack)
-        if library_dir is None:
-            return {}
 
-        results: dict[str | None, list[tuple[str, Traversable]]] = {}
+    The bundled library does not change while the app runs, so the result is
+    computed once and cached; use ``iter_library.cache_clear()`` to rescan. The
+    shared result is returned as a read-only mapping of tuples.
+    """
 
-        def add_entry(group: str | None, entry: pathlib.Path) -> None:
-            if not entry.is_file():
-                return
-            if entry.suffix.lower() not in _LIBRARY_EXTS:
-                return
-            results.setdefault(group, []).append((entry.name, entry))
+    library_dir = _resolve_library_dir()
+    if library_dir is None:
+        return types.MappingProxyType({})
+
+    # Entries carry their lowercase sort key so it is computed once per file.
+    results: dict[str | None, list[tuple[str, str, Traversable]]] = {}
+
+    def add_entry(group: str | None, entry: os.DirEntry[str]) -> None:
+        # DirEntry caches the type from readdir, so this avoids a stat per file.
+        if not entry.is_file():
+            return
+        # One lowercase copy serves both the suffix test and the sort key.
+        lower_name = entry.name.lower()
+        if not lower_name.endswith(_LIBRARY_SUFFIXES):
+            return
+        results.setdefault(group, []).append(
+            (lower_name, entry.name, pathlib.Path(entry.path))
+        )
 
-        for entry in library_dir.iterdir():
+    with os.scandir(library_dir) as it:
+        for entry in it:
             if entry.is_dir():
-                for nested in entry.iterdir():
-                    add_entry(entry.name, nested)
+                with os.scandir(entry.path) as nested_it:
+                    for nested in nested_it:
+                        add_entry(entry.name, nested)
                 continue
             add_entry(None, entry)
 
-        for entries in results.values():
-            entries.sort(key=lambda item: item[0].lower())
+    sort_key = operator.itemgetter(0)
+    for entries in results.values():
+        entries.sort(key=sort_key)
 
-        return dict(
-            sorted(results.items(), key=lambda item: (item[0] is not None, item[0] or ""))
-        )
+    return types.MappingProxyType(
+        {
+            group: tuple((name, entry) for _key, name, entry in entries)
+            for group, entries in sorted(
+                results.items(), key=lambda item: (item[0] is not None, item[0] or "")
+            )
+        }
+    )
 
 
-def _resolve_library_dir(stack: contextlib.ExitStack) -> pathlib.Path | None:
+def _resolve_library_dir() -> pathlib.Path | None:
     """Locate the packaged library directory.
 
     The primary lookup uses ``importlib.resources`` so that editable/source installs
@@ -61,6 +88,9 @@ def _resolve_library_dir(stack: contextlib.ExitStack) -> pathlib.Path | None:
     ``_MEIPASS`` payload.
     """
 
+    # Deferred so importing fimpad does not load the resources machinery.
+    from importlib import resources
+
     package_files: Traversable | None
     try:
         package_files = resources.files(__package__)
@@ -68,12 +98,21 @@ def _resolve_library_dir(stack: contextlib.ExitStack) -> pathlib.Path | None:
         package_files = None
 
     if package_files is not None:
+        target = package_files.joinpath("library")
+        # Unpacked installs already expose a real directory; only zip/multiplexed
+        # resources need ``as_file`` to materialize one.
+        if isinstance(target, pathlib.Path) and target.is_dir():
+            return target
+        # Zipped installs are extracted to a temporary directory. The cached
+        # listing hands out paths inside it, so the extraction is kept for the
+        # rest of the process and only cleaned up at exit.
         with contextlib.suppress(FileNotFoundError):
-            library_dir = stack.enter_context(
-                resources.as_file(package_files.joinpath("library"))
-            )
+            extraction = resources.as_file(target)
+            library_dir = extraction.__enter__()
             if library_dir.exists():
+                atexit.register(extraction.__exit__, None, None, None)
                 return library_dir
+            extraction.__exit__(None, None, None)
 
     if getattr(sys, "frozen", False):
         base = pathlib.Path(getattr(sys, "_MEIPASS", ""))
@@ -1,53 +1,73 @@
 """Utilities for tokenizing and parsing triple-bracket markers."""
 from __future__ import annotations
 
+import bisect
+import functools
 import json
 import re
-from collections.abc import Iterator
-from dataclasses import dataclass
+import sys
+import types
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
 
 DEFAULT_MARKER_MAX_TOKENS = 100
 
 TRIPLE_RE = re.compile(r"\[\[\[(?P<body>.*?)\]\]\]", re.DOTALL)
 
+# Patterns used while parsing individual tags, compiled once at import.
+_COUNT_RE = re.compile(r"\d+")
+_COUNT_BANG_RE = re.compile(r"\d+!")
+_TRAILING_COMMA_RE = re.compile(r",(?=\s*[}\]])")
+# A complete quoted literal for each quote character; escapes are expanded after.
+_STRING_LITERAL_RES = {
+    '"': re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL),
+    "'": re.compile(r"'((?:[^'\\]|\\.)*)'", re.DOTALL),
+}
+# Characters that end a bare word or need the careful scan in _scan_single_token.
+_WORD_STOP_RE = re.compile(r"[\s;\"'(\\]")
+_WHITESPACE_RE = re.compile(r"\s*")
+_SEPARATORS_RE = re.compile(r"[\s;]*")
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
 
 class TagParseError(ValueError):
     """Raised when a triple-bracket tag cannot be parsed."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TextToken:
     start: int
     end: int
     text: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FIMFunction:
     name: str
     args: tuple[str, ...]
     phase: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FIMTag:
     max_tokens: int
     functions: tuple[FIMFunction, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ConfigTag:
-    settings: dict[str, object]
+    settings: Mapping[str, object]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PrefixSuffixTag:
     kind: str  # "prefix" or "suffix"
     hardness: str  # "soft" or "hard"
     is_close: bool = False
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CommentTag:
     body: str
     position: str | None
@@ -56,7 +76,7 @@ class CommentTag:
 TagNode = FIMTag | ConfigTag | PrefixSuffixTag | CommentTag
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TagToken:
     start: int
     end: int
@@ -64,28 +84,30 @@ class TagToken:
     body: str
     tag: TagNode | None
     error: str | None = None
+    # Derived from ``tag``/``error`` once, since scans read it for every token.
+    kind: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "kind", _tag_kind(self.tag, self.error))
+
+
+_TAG_KINDS: dict[type, str] = {FIMTag: "fim", ConfigTag: "config", CommentTag: "comment"}
 
-    @property
-    def kind(self) -> str:
-        if self.error:
-            return "invalid"
-        if self.tag is None:
-            return "unknown"
-        if isinstance(self.tag, FIMTag):
-            return "fim"
-        if isinstance(self.tag, ConfigTag):
-            return "config"
-        if isinstance(self.tag, PrefixSuffixTag):
-            return self.tag.kind
-        if isinstance(self.tag, CommentTag):
-            return "comment"
-        return "unknown"
+
+def _tag_kind(tag: TagNode | None, error: str | None) -> str:
+    if error:
+        return "invalid"
+    if isinstance(tag, PrefixSuffixTag):
+        return tag.kind
+    # Tag node classes are final, so an exact type lookup replaces the
+    # isinstance chain; None and anything else map to "unknown".
+    return _TAG_KINDS.get(type(tag), "unknown")
 
 
 Token = TextToken | TagToken
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FIMRequest:
     """Parsed representation of a FIM marker relative to source text.
 
@@ -111,7 +133,7 @@ class FIMRequest:
     use_completion: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class _TokenPiece:
     kind: str
     value: str
@@ -132,6 +154,27 @@ FUNCTION_SPECS: dict[str, dict[str, object]] = {
 }
 
 
+@dataclass(frozen=True, slots=True)
+class _FunctionSpec:
+    args: int | None
+    min_args: int | None
+    default_phase: str | None
+    require_string: bool
+
+
+# FUNCTION_SPECS as typed records, so _parse_function reads attributes instead
+# of making several dict lookups per function.
+_FUNCTION_SPECS: dict[str, _FunctionSpec] = {
+    name: _FunctionSpec(
+        args=spec.get("args"),  # type: ignore[arg-type]
+        min_args=spec.get("min_args"),  # type: ignore[arg-type]
+        default_phase=spec.get("default_phase"),  # type: ignore[arg-type]
+        require_string=bool(spec.get("require_string")),
+    )
+    for name, spec in FUNCTION_SPECS.items()
+}
+
+
 FUNCTION_RE = re.compile(
     r"(?:(?P<phase>[A-Za-z_][\w-]*)\:)?(?P<name>[A-Za-z_][\w]*)\((?P<args>.*)\)$"
 )
@@ -140,17 +183,33 @@ FUNCTION_RE = re.compile(
 def parse_triple_tokens(content: str) -> Iterator[Token]:
     """Yield tokens for ``content`` splitting around ``[[[...]]]`` regions."""
 
+    yield from _tokenize(content)
+
+
+# Tokens are immutable, so the last few documents' token streams are kept to
+# avoid rescanning an unchanged buffer (e.g. repeated generate/validate calls).
+@functools.lru_cache(maxsize=4)
+def _tokenize(content: str) -> tuple[Token, ...]:
+    # Equivalent to iterating TRIPLE_RE.finditer, but str.find locates the
+    # delimiters without running the regex engine over the plain text between.
+    find = content.find
     last_index = 0
     tokens: list[Token] = []
-    for match in TRIPLE_RE.finditer(content):
-        start, end = match.span()
+    while True:
+        start = find("[[[", last_index)
+        if start < 0:
+            break
+        close = find("]]]", start + 3)
+        if close < 0:
+            break
+        end = close + 3
         if start > last_index:
             tokens.append(
                 TextToken(start=last_index, end=start, text=content[last_index:start])
             )
 
-        raw = match.group(0)
-        inner = match.group("body") or ""
+        raw = content[start:end]
+        inner = content[start + 3 : close]
         tag = _parse_tag(inner)
         tokens.append(TagToken(start=start, end=end, raw=raw, body=inner, tag=tag))
         last_index = end
@@ -160,7 +219,7 @@ def parse_triple_tokens(content: str) -> Iterator[Token]:
             TextToken(start=last_index, end=len(content), text=content[last_index:])
         )
 
-    yield from tokens
+    return tuple(tokens)
 
 
 def parse_fim_request(
@@ -168,7 +227,7 @@ def parse_fim_request(
     cursor_offset: int,
     default_n: int = DEFAULT_MARKER_MAX_TOKENS,
     *,
-    tokens: list[Token] | None = None,
+    tokens: Sequence[Token] | None = None,
     marker_token: TagToken | None = None,
     force_completion: bool = False,
 ) -> FIMRequest | None:
@@ -181,25 +240,27 @@ def parse_fim_request(
     """
 
     try:
-        tokens = tokens or list(parse_triple_tokens(content))
+        index = _build_tag_index(tokens) if tokens else _tag_index(content)
     except TagParseError:
         return None
 
     if marker_token is None:
-        marker_token = _find_fim_token(tokens, cursor_offset)
+        marker_token = _find_fim_token(index, cursor_offset)
     if marker_token is None or not isinstance(marker_token.tag, FIMTag):
         return None
 
     fim_tag = marker_token.tag
-    prefix_token, suffix_token = _find_prefix_suffix(tokens, marker_token)
+    prefix_token, suffix_token = _find_prefix_suffix(index, marker_token)
     before_region, after_region = _extract_regions_clean(
-        content, tokens, marker_token, prefix_token, suffix_token
+        content, index, marker_token, prefix_token, suffix_token
+    )
+    safe_suffix = _text_between(
+        index, marker_token.end, suffix_token.start if suffix_token else len(content)
     )
-    safe_suffix = _strip_triple_tags(after_region)
     use_completion = force_completion or safe_suffix.strip() == ""
 
     max_tokens = _clamp_tokens(fim_tag.max_tokens or default_n, default_n)
-    keep_tags = any(fn.name in {"keep", "keep_tags"} for fn in fim_tag.functions)
+    keep_tags = False
 
     stop_patterns: list[str] = []
     chop_patterns: list[str] = []
@@ -209,6 +270,7 @@ def parse_fim_request(
 
     for fn in fim_tag.functions:
         if fn.name in {"keep", "keep_tags"}:
+            keep_tags = True
             continue
         if fn.name in {"temperature", "temp"} and fn.args:
             try:
@@ -233,8 +295,14 @@ def parse_fim_request(
     if prepend_actions:
         before_region = f"{before_region}{''.join(prepend_actions)}"
 
-    chop_patterns = _dedupe_preserve(chop_patterns)
-    stop_patterns = _dedupe_preserve([p for p in stop_patterns if p not in chop_patterns])
+    # Most tags have at most one stop/chop pattern; skip the dedupe work then.
+    if len(chop_patterns) > 1:
+        chop_patterns = _dedupe_preserve(chop_patterns)
+    if chop_patterns:
+        chop_set = set(chop_patterns)
+        stop_patterns = [p for p in _dedupe_preserve(stop_patterns) if p not in chop_set]
+    elif len(stop_patterns) > 1:
+        stop_patterns = _dedupe_preserve(stop_patterns)
 
     return FIMRequest(
         marker=marker_token,
@@ -254,12 +322,16 @@ def parse_fim_request(
     )
 
 
+# Tag bodies repeat across re-parses of an edited document and tag nodes are
+# immutable, so parsed results are shared. Parse errors are not cached.
+@functools.lru_cache(maxsize=512)
 def _parse_tag(body: str) -> TagNode | None:
     stripped = body.strip()
     if not stripped:
         return None
 
-    if re.match(r"\d+!", stripped):
+    # The "N!" pattern can only match a body that starts with a digit.
+    if stripped[0].isdigit() and _COUNT_BANG_RE.match(stripped):
         raise TagParseError("Unexpected '!' after FIM token count")
 
     if stripped.startswith("{"):
@@ -282,19 +354,22 @@ def _parse_tag(body: str) -> TagNode | None:
         normalized = base_word[1:] if is_close else base_word
         normalized_no_bang = normalized.rstrip("!")
 
-        fim_match = re.fullmatch(r"(?P<num>\d+)", base_word)
-        if fim_match:
-            remainder = stripped[len(fim_match.group("num")) :].lstrip()
+        # str.isdecimal() accepts exactly the characters \d matches, without
+        # dispatching to the regex engine for every FIM tag.
+        # The count is checked on the first word, not the body, so a body
+        # with leading separators such as ";;5" still parses as a FIM tag.
+        if base_word.isdecimal():
+            remainder = stripped[len(base_word) :].lstrip()
             if remainder and not remainder.startswith(";"):
                 raise TagParseError(
                     "FIM tags require semicolons between the token count and statements"
                 )
 
-            n_val = int(fim_match.group("num"))
+            n_val = int(base_word)
             functions = [_token_to_function(tok) for tok in tokens[1:]]
             return FIMTag(max_tokens=n_val, functions=tuple(functions))
 
-        name_key = normalized_no_bang.casefold()
+        name_key = _fold(normalized_no_bang)
         if name_key in {"prefix", "suffix"}:
             if normalized_no_bang not in {"prefix", "PREFIX", "suffix", "SUFFIX"}:
                 raise TagParseError(f"Unrecognized tag: {body}")
@@ -302,11 +377,13 @@ def _parse_tag(body: str) -> TagNode | None:
             if hardness == "soft" and normalized_no_bang.isupper():
                 hardness = "hard"
             if len(tokens) > 1 and tokens[1].kind == "word":
-                nxt = tokens[1].value.casefold()
+                nxt = _fold(tokens[1].value)
                 if nxt in {"hard", "soft"}:
                     hardness = nxt
+            # _fold() returns fresh strings; intern them so the kind/hardness
+            # comparisons made per token hit the identity fast path.
             return PrefixSuffixTag(
-                kind=name_key, hardness=hardness, is_close=is_close
+                kind=sys.intern(name_key), hardness=sys.intern(hardness), is_close=is_close
             )
 
     if first.kind == "string":
@@ -315,11 +392,17 @@ def _parse_tag(body: str) -> TagNode | None:
     raise TagParseError(f"Unrecognized tag: {body}")
 
 
+def _fold(text: str) -> str:
+    # Tag names are almost always ASCII, where lower() matches casefold() and
+    # is cheaper; keep full case folding for anything else.
+    return text.lower() if text.isascii() else text.casefold()
+
+
 def _parse_config_tag(body: str) -> ConfigTag:
     if not body.startswith("{") or not body.endswith("}"):
         raise TagParseError("Config tags must start with '{' and end with '}'")
 
-    sanitized = re.sub(r",(?=\s*[}\]])", "", body)
+    sanitized = _TRAILING_COMMA_RE.sub("", body)
 
     try:
         parsed = json.loads(sanitized)
@@ -332,7 +415,8 @@ def _parse_config_tag(body: str) -> ConfigTag:
     if any(not isinstance(k, str) for k in parsed):
         raise TagParseError("Config tag keys must be strings")
 
-    return ConfigTag(settings=parsed)
+    # Parsed tags are cached and shared between tokens, so expose a read-only view.
+    return ConfigTag(settings=types.MappingProxyType(parsed))
 
 
 def _token_to_function(token: _TokenPiece) -> FIMFunction:
@@ -343,57 +427,73 @@ def _token_to_function(token: _TokenPiece) -> FIMFunction:
     return _parse_function(token.value)
 
 
+# The same calls (e.g. stop("</code>")) recur across differently worded tags,
+# which miss the _parse_tag cache; FIMFunction is immutable, so share results.
+@functools.lru_cache(maxsize=1024)
 def _parse_function(func_text: str) -> FIMFunction:
     match = FUNCTION_RE.fullmatch(func_text)
     if not match:
         raise TagParseError(f"Malformed function: {func_text}")
 
+    # Names and phases come from a small vocabulary; interning the regex groups
+    # makes later comparisons against the literal names identity checks.
     phase = match.group("phase")
-    name = match.group("name")
+    name = sys.intern(match.group("name"))
     args_text = match.group("args").strip()
 
-    spec = FUNCTION_SPECS.get(name)
+    spec = _FUNCTION_SPECS.get(name)
     if spec is None:
         raise TagParseError(f"Unknown function: {name}")
 
-    args: list[str] = []
-    if args_text:
-        pieces = [piece.strip() for piece in args_text.split(",") if piece.strip()]
-        for piece in pieces:
-            args.append(_parse_arg(piece))
-
-    expected_args = spec.get("args")
-    if (
-        isinstance(expected_args, int)
-        and expected_args >= 0
-        and len(args) != expected_args
-    ):
+    args = _split_args(args_text) if args_text else []
+
+    expected_args = spec.args
+    if expected_args is not None and expected_args >= 0 and len(args) != expected_args:
         raise TagParseError(
             f"{name}() expects {expected_args} arg(s) but got {len(args)}"
         )
 
-    min_args = spec.get("min_args")
-    if isinstance(min_args, int) and len(args) < min_args:
+    min_args = spec.min_args
+    if min_args is not None and len(args) < min_args:
         raise TagParseError(
             f"{name}() expects at least {min_args} arg(s) but got {len(args)}"
         )
 
-    if spec.get("require_string") and any(not isinstance(arg, str) for arg in args):
+    if spec.require_string and any(not isinstance(arg, str) for arg in args):
         raise TagParseError(f"{name}() requires string argument(s)")
 
-    phase_value = phase or spec.get("default_phase")
-    return FIMFunction(name=name, args=tuple(str(a) for a in args), phase=phase_value)  # type: ignore[arg-type]
+    phase_value = sys.intern(phase) if phase else spec.default_phase
+    return FIMFunction(name=name, args=tuple(str(a) for a in args), phase=phase_value)
 
 
-def _parse_arg(piece: str) -> str:
-    if not piece:
-        return ""
-    if piece[0] in {'"', "'"}:
-        value, index = _parse_string_literal(piece, 0)
-        if index != len(piece):
-            raise TagParseError("Unexpected trailing characters in string argument")
-        return value
-    return piece
+def _split_args(text: str) -> list[str]:
+    # One pass over the argument list: string literals are read whole, so
+    # commas inside quotes do not split them; bare arguments end at a comma.
+    args: list[str] = []
+    n = len(text)
+    i = 0
+    while i < n:
+        i = _consume_whitespace(text, i)
+        if i >= n:
+            break
+        ch = text[i]
+        if ch == ",":
+            i += 1
+        elif ch == '"' or ch == "'":
+            value, i = _parse_string_literal(text, i)
+            i = _consume_whitespace(text, i)
+            if i < n and text[i] != ",":
+                raise TagParseError("Unexpected trailing characters in string argument")
+            args.append(value)
+        else:
+            end = text.find(",", i)
+            if end < 0:
+                end = n
+            piece = text[i:end].rstrip()
+            if piece:
+                args.append(piece)
+            i = end
+    return args
 
 
 def _scan_tokens(body: str) -> list[_TokenPiece]:
@@ -408,21 +508,25 @@ def _scan_tokens(body: str) -> list[_TokenPiece]:
 
 def _scan_general_tokens(body: str) -> list[_TokenPiece]:
     tokens: list[_TokenPiece] = []
-    i = 0
-    while i < len(body):
-        ch = body[i]
-        if ch.isspace() or ch == ";":
-            i += 1
-            continue
+    n = len(body)
+    i = _skip_separators(body, 0)
+    while i < n:
         token, i = _scan_single_token(body, i)
         tokens.append(token)
+        i = _skip_separators(body, i)
     return tokens
 
 
+def _skip_separators(text: str, i: int) -> int:
+    match = _SEPARATORS_RE.match(text, i)
+    assert match is not None  # [\s;]* matches at every position
+    return match.end()
+
+
 def _scan_fim_tokens(body: str) -> list[_TokenPiece]:
     tokens: list[_TokenPiece] = []
 
-    num_match = re.match(r"\d+", body)
+    num_match = _COUNT_RE.match(body)
     if not num_match:
         raise TagParseError("FIM tags must start with an integer")
 
@@ -449,7 +553,7 @@ def _scan_fim_tokens(body: str) -> list[_TokenPiece]:
         token, i = _scan_single_token(body, i)
         tokens.append(token)
         i = _consume_whitespace(body, i)
-        if i < len(body) and body[i] not in {";"}:
+        if i < len(body) and body[i] != ";":
             raise TagParseError("FIM tags require semicolons between statements")
 
     return tokens
@@ -457,18 +561,21 @@ def _scan_fim_tokens(body: str) -> list[_TokenPiece]:
 
 def _scan_single_token(body: str, i: int) -> tuple[_TokenPiece, int]:
     ch = body[i]
-    if ch in {'"', "'"}:
+    if ch == '"' or ch == "'":
         value, new_i = _parse_string_literal(body, i)
         return _TokenPiece(kind="string", value=value, quote=ch), new_i
     if ch == "(":
         value, new_i = _parse_parenthetical(body, i)
         return _TokenPiece(kind="comment", value=value), new_i
 
+    # Jump over the plain run of the word; the loop below resumes at the first
+    # character that ends it or needs quote/paren/escape handling.
+    stop = _WORD_STOP_RE.search(body, i)
+    j = stop.start() if stop else len(body)
     depth = 0
-    j = i
     while j < len(body):
         ch = body[j]
-        if ch in {'"', "'"}:
+        if ch == '"' or ch == "'":
             _value, j = _parse_string_literal(body, j)
             continue
         if ch == "(":
@@ -491,44 +598,37 @@ def _scan_single_token(body: str, i: int) -> tuple[_TokenPiece, int]:
 
 
 def _consume_whitespace(text: str, i: int) -> int:
-    while i < len(text) and text[i].isspace():
-        i += 1
-    return i
+    match = _WHITESPACE_RE.match(text, i)
+    assert match is not None  # \s* matches at every position
+    return match.end()
 
 
 def _parse_string_literal(text: str, start: int) -> tuple[str, int]:
     quote = text[start]
-    assert quote in {'"', "'"}
-    i = start + 1
-    chars: list[str] = []
-    while i < len(text):
-        ch = text[i]
-        if ch == "\\":
-            i += 1
-            if i >= len(text):
-                chars.append("\\")
-                break
-            esc = text[i]
-            if esc == "n":
-                chars.append("\n")
-            elif esc == "t":
-                chars.append("\t")
-            elif esc == "r":
-                chars.append("\r")
-            elif esc == quote:
-                chars.append(quote)
-            else:
-                chars.append(esc)
-            i += 1
-            continue
-        if ch == quote:
-            return "".join(chars), i + 1
-        chars.append(ch)
-        i += 1
-    raise TagParseError("Unterminated string literal")
+    assert quote == '"' or quote == "'"
+    match = _STRING_LITERAL_RES[quote].match(text, start)
+    if match is None:
+        raise TagParseError("Unterminated string literal")
+    value = match.group(1)
+    if "\\" in value:
+        value = _ESCAPE_RE.sub(_expand_escape, value)
+    return value, match.end()
+
+
+def _expand_escape(match: re.Match[str]) -> str:
+    esc = match.group(1)
+    return _ESCAPES.get(esc, esc)
 
 
 def _parse_parenthetical(text: str, start: int) -> tuple[str, int]:
+    # Common case: no nesting or escapes before the first ")", so the comment
+    # is a single slice.
+    close = text.find(")", start + 1)
+    if close != -1:
+        inner = text[start + 1 : close]
+        if "(" not in inner and "\\" not in inner:
+            return inner, close + 1
+
     depth = 0
     chars: list[str] = []
     i = start
@@ -558,14 +658,16 @@ def _parse_parenthetical(text: str, start: int) -> tuple[str, int]:
     raise TagParseError("Unterminated parenthetical in comment tag")
 
 
-def _strip_triple_tags(text: str) -> str:
-    parts: list[str] = []
-    last_index = 0
-    for match in TRIPLE_RE.finditer(text):
-        parts.append(text[last_index : match.start()])
-        last_index = match.end()
-    parts.append(text[last_index:])
-    return "".join(parts)
+def _text_between(index: _TagIndex, start: int, end: int) -> str:
+    """Join the plain text between two tag boundaries.
+
+    This is the region with every triple-bracket tag removed, sliced from the
+    indexed text tokens instead of rescanning the text for tags.
+    """
+
+    lo = bisect.bisect_left(index.text_starts, start)
+    hi = bisect.bisect_left(index.text_starts, end, lo)
+    return "".join(index.texts[lo:hi])
 
 
 def _clamp_tokens(n: int, default_n: int) -> int:
@@ -577,96 +679,126 @@ def _clamp_tokens(n: int, default_n: int) -> int:
 
 
 def _dedupe_preserve(items: list[str]) -> list[str]:
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        ordered.append(item)
-    return ordered
+    return list(dict.fromkeys(items))
+
 
+@dataclass(frozen=True, slots=True)
+class _TagIndex:
+    """Per-kind tag positions of a document, in document order.
+
+    Built in one pass over the tokens so region lookups can bisect these
+    arrays instead of rescanning every token.
+    """
 
-def _find_fim_token(tokens: list[Token], cursor_offset: int) -> TagToken | None:
-    marker_token: TagToken | None = None
+    fim_starts: tuple[int, ...]
+    fims: tuple[TagToken, ...]
+    prefix_starts: tuple[int, ...]
+    prefixes: tuple[TagToken, ...]
+    suffix_starts: tuple[int, ...]
+    suffixes: tuple[TagToken, ...]
+    comment_starts: tuple[int, ...]
+    comment_ends: tuple[int, ...]
+    text_starts: tuple[int, ...]
+    texts: tuple[str, ...]
+
+
+def _build_tag_index(tokens: Sequence[Token]) -> _TagIndex:
+    fims: list[TagToken] = []
+    prefixes: list[TagToken] = []
+    suffixes: list[TagToken] = []
+    comments: list[TagToken] = []
+    text_tokens: list[TextToken] = []
     for token in tokens:
-        if not isinstance(token, TagToken) or token.kind != "fim":
+        if not isinstance(token, TagToken):
+            text_tokens.append(token)
             continue
-        if not cursor_within_span(token.start, token.end, cursor_offset):
+        kind = token.kind
+        if kind == "fim":
+            fims.append(token)
+        elif kind == "comment":
+            comments.append(token)
+        elif getattr(token.tag, "is_close", False):
             continue
-        if marker_token is None or token.start >= marker_token.start:
-            marker_token = token
-    return marker_token
+        elif kind == "prefix":
+            prefixes.append(token)
+        elif kind == "suffix":
+            suffixes.append(token)
+    return _TagIndex(
+        fim_starts=tuple(token.start for token in fims),
+        fims=tuple(fims),
+        prefix_starts=tuple(token.start for token in prefixes),
+        prefixes=tuple(prefixes),
+        suffix_starts=tuple(token.start for token in suffixes),
+        suffixes=tuple(suffixes),
+        comment_starts=tuple(token.start for token in comments),
+        comment_ends=tuple(token.end for token in comments),
+        text_starts=tuple(token.start for token in text_tokens),
+        texts=tuple(token.text for token in text_tokens),
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _tag_index(content: str) -> _TagIndex:
+    return _build_tag_index(_tokenize(content))
+
+
+def _find_fim_token(index: _TagIndex, cursor_offset: int) -> TagToken | None:
+    # Tag spans are disjoint, so only the last FIM tag starting before the
+    # cursor can contain it.
+    k = bisect.bisect_left(index.fim_starts, cursor_offset) - 1
+    if k < 0:
+        return None
+    token = index.fims[k]
+    if not cursor_within_span(token.start, token.end, cursor_offset):
+        return None
+    return token
 
 
 def _find_prefix_suffix(
-    tokens: list[Token], marker_token: TagToken
+    index: _TagIndex, marker_token: TagToken
 ) -> tuple[TagToken | None, TagToken | None]:
-    prefix_token: TagToken | None = None
-    suffix_token: TagToken | None = None
-    for token in tokens:
-        if not isinstance(token, TagToken):
-            continue
-        if (
-            token.kind == "prefix"
-            and not getattr(token.tag, "is_close", False)
-            and token.start < marker_token.start
-        ):
-            prefix_token = token
-        elif (
-            token.kind == "suffix"
-            and not getattr(token.tag, "is_close", False)
-            and token.start >= marker_token.end
-        ):
-            suffix_token = token
-            break
+    # Last open prefix starting before the marker, first open suffix after it.
+    i = bisect.bisect_left(index.prefix_starts, marker_token.start) - 1
+    j = bisect.bisect_left(index.suffix_starts, marker_token.end)
+    prefix_token = index.prefixes[i] if i >= 0 else None
+    suffix_token = index.suffixes[j] if j < len(index.suffixes) else None
     return prefix_token, suffix_token
 
 
-def _strip_comment_segments(
-    content: str, tokens: list[Token], start: int, end: int
-) -> str:
-    pieces: list[str] = []
-    cursor = start
-    for token in tokens:
-        if not isinstance(token, TagToken) or token.kind != "comment":
-            continue
-        if token.start >= end:
-            break
-        if token.end <= start:
-            continue
-        if cursor < token.start:
-            pieces.append(content[cursor : token.start])
-        cursor = max(cursor, token.end)
-    if cursor < end:
-        pieces.append(content[cursor:end])
-    return "".join(pieces)
-
-
 def _extract_regions_clean(
     content: str,
-    tokens: list[Token],
+    index: _TagIndex,
     marker_token: TagToken,
     prefix_token: TagToken | None,
     suffix_token: TagToken | None,
 ) -> tuple[str, str]:
-    if prefix_token is not None:
-        before_region = _strip_comment_segments(
-            content, tokens, prefix_token.end, marker_token.start
-        )
-    else:
-        before_region = _strip_comment_segments(content, tokens, 0, marker_token.start)
+    """Return the text before and after the marker with comment tags removed.
 
-    if suffix_token is not None:
-        after_region = _strip_comment_segments(
-            content, tokens, marker_token.end, suffix_token.start
-        )
-    else:
-        after_region = _strip_comment_segments(
-            content, tokens, marker_token.end, len(content)
-        )
+    Both regions are cut in one walk over the sorted comment spans, starting
+    from the first comment that ends inside the before region.
+    """
 
-    return before_region, after_region
+    before_start = prefix_token.end if prefix_token is not None else 0
+    after_end = suffix_token.start if suffix_token is not None else len(content)
+    comment_starts = index.comment_starts
+    comment_ends = index.comment_ends
+    k = bisect.bisect_right(comment_ends, before_start)
+
+    regions: list[str] = []
+    for start, end in ((before_start, marker_token.start), (marker_token.end, after_end)):
+        pieces: list[str] = []
+        cursor = start
+        while k < len(comment_starts) and comment_starts[k] < end:
+            if comment_ends[k] > start:
+                if cursor < comment_starts[k]:
+                    pieces.append(content[cursor : comment_starts[k]])
+                cursor = max(cursor, comment_ends[k])
+            k += 1
+        if cursor < end:
+            pieces.append(content[cursor:end])
+        regions.append("".join(pieces))
+
+    return regions[0], regions[1]
 
 
 def cursor_within_span(start: int, end: int, cursor_offset: int) -> bool:
@@ -1,6 +1,7 @@
 import tkinter as tk
 
-from fimpad.app import _cursor_offset_from_text_widget
+from fimpad.app import FIMPad, _cursor_offset_from_text_widget
+from fimpad.parser import parse_triple_tokens
 
 
 class DummyText:
@@ -29,3 +30,15 @@ def test_cursor_offset_returns_none_on_widget_error():
             raise RuntimeError("boom")
 
     assert _cursor_offset_from_text_widget(BrokenText()) is None
+
+
+def test_find_active_tag_matches_tag_containing_cursor():
+    content = "a[[[10]]][[[prefix]]] text [[[20; stop('x')]]]\n"
+    tokens = tuple(parse_triple_tokens(content))
+    tags = [(tok.start, tok.end) for tok in tokens if hasattr(tok, "tag")]
+
+    for offset in range(len(content) + 1):
+        found = FIMPad._find_active_tag(None, tokens, offset)
+        expected = [span for span in tags if span[0] < offset <= span[1]]
+        actual = [(found.start, found.end)] if found else []
+        assert actual == expected[-1:]
@@ -0,0 +1,98 @@
+from fimpad import aspell
+
+
+class _Stream:
+    """In-memory pipe whose reads and writes keep separate positions."""
+
+    def __init__(self) -> None:
+        self._lines: list[bytes] = []
+
+    def write_line(self, data: bytes) -> None:
+        self._lines.extend(line + b"\n" for line in data.split(b"\n")[:-1])
+
+    def readline(self) -> bytes:
+        return self._lines.pop(0) if self._lines else b""
+
+
+class _FakeStdin:
+    def __init__(self, proc: "_FakeProc") -> None:
+        self._proc = proc
+
+    def write(self, data: bytes) -> None:
+        self._proc.writes += 1
+        for line in data.decode().splitlines():
+            word = line[1:]
+            if word in self._proc.bad:
+                self._proc.stdout.write_line(f"& {word} 1 0: word\n\n".encode())
+            else:
+                self._proc.stdout.write_line(b"*\n\n")
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeProc:
+    spawned: list["_FakeProc"] = []
+
+    def __init__(self, args, **_kwargs) -> None:
+        self.args = args
+        self.bad = {"wurd"}
+        self.killed = False
+        self.writes = 0
+        self.stdin = _FakeStdin(self)
+        self.stdout = _Stream()
+        self.stdout.write_line(b"@(#) International Ispell Version 3.1.20\n")
+        _FakeProc.spawned.append(self)
+
+    def poll(self):
+        return 0 if self.killed else None
+
+    def kill(self) -> None:
+        self.killed = True
+
+    def wait(self, timeout=None) -> int:
+        return 0
+
+
+def test_shared_pipe_reuses_process_and_respawns_on_language_change(monkeypatch):
+    _FakeProc.spawned.clear()
+    monkeypatch.setattr(aspell.subprocess, "Popen", _FakeProc)
+
+    try:
+        assert aspell.shared_pipe("en_US").misspelled(["good", "wurd", "wurd"]) == {"wurd"}
+        assert aspell.shared_pipe("en_US").misspelled(["fine"]) == set()
+        assert len(_FakeProc.spawned) == 1
+        assert _FakeProc.spawned[0].args[:4] == ["aspell", "-a", "-l", "en_US"]
+
+        aspell.shared_pipe("de_DE").misspelled(["gut"])
+        assert len(_FakeProc.spawned) == 2
+        assert _FakeProc.spawned[0].killed
+    finally:
+        aspell.close_shared_pipe()
+
+
+def test_close_does_not_wait_for_a_running_check(monkeypatch):
+    monkeypatch.setattr(aspell.subprocess, "Popen", _FakeProc)
+    pipe = aspell.AspellPipe("en_US")
+    pipe.misspelled(["good"])
+    proc = pipe._proc
+
+    with pipe._lock:
+        pipe.close()
+
+    assert proc.killed
+
+
+def test_misspelled_sends_words_in_batches(monkeypatch):
+    monkeypatch.setattr(aspell.subprocess, "Popen", _FakeProc)
+    pipe = aspell.AspellPipe("en_US")
+    words = [f"w{i}" for i in range(1000)] + ["wurd"]
+
+    try:
+        assert pipe.misspelled(words) == {"wurd"}
+        assert 1 < pipe._proc.writes < len(words)
+    finally:
+        pipe.close()
@@ -19,6 +19,8 @@ from fimpad.bol_utils import (
         (["  foo", " bar"], "spaces"),
         (["foo", "bar"], None),
         (["\tfoo", "  bar"], "mixed"),
+        ([" \tfoo", "\tbar"], "mixed"),
+        (["", "\tfoo", "bar"], "tabs"),
     ],
 )
 def test_leading_whitespace_style(lines, expected):
@@ -39,3 +39,27 @@ def test_stream_completion_uses_split_timeouts(monkeypatch):
     assert captured["stream"] is True
     assert captured["json"] == {"prompt": "x"}
     assert captured["timeout"] == (client.CONNECT_TIMEOUT, client.READ_TIMEOUT)
+
+
+class _LinesResponse(_DummyResponse):
+    def __init__(self, lines: list[bytes]) -> None:
+        super().__init__()
+        self._lines = lines
+
+    def iter_lines(self, *, decode_unicode: bool) -> Any:
+        yield from self._lines
+
+
+def test_sse_chunks_reuses_detected_shape_and_tolerates_stray_chunks():
+    resp = _LinesResponse(
+        [
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            b'data: {"choices": [{"delta": {"content": "he"}}]}',
+            b'data: {"choices": [{"delta": {"content": "llo"}}]}',
+            b'data: {"choices": [{"delta": {}, "finish_reason": "stop"}]}',
+            b'data: {"choices": [{"text": "!"}]}',
+            b"data: [DONE]",
+        ]
+    )
+
+    assert list(client._sse_chunks(resp)) == ["he", "llo", "!"]
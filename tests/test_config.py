@@ -10,8 +10,8 @@ from fimpad import config
 def _use_temp_config(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
     app_dir = tmp_path / "confdir"
     cfg_path = app_dir / "config.json"
-    monkeypatch.setattr(config, "APP_DIR", str(app_dir))
-    monkeypatch.setattr(config, "CONFIG_PATH", str(cfg_path))
+    monkeypatch.setattr(config, "APP_DIR", app_dir)
+    monkeypatch.setattr(config, "CONFIG_PATH", cfg_path)
     return app_dir
 
 
@@ -87,3 +87,50 @@ def test_load_config_recovers_non_object(
 
     with cfg_path.open(encoding="utf-8") as f:
         assert json.load(f) == config.DEFAULTS
+
+
+def test_save_config_recreates_removed_app_dir(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    app_dir = _use_temp_config(monkeypatch, tmp_path)
+    config.save_config({"value": 1})
+
+    (app_dir / "config.json").unlink()
+    app_dir.rmdir()
+    config.save_config({"value": 2})
+
+    with (app_dir / "config.json").open(encoding="utf-8") as f:
+        assert json.load(f) == {"value": 2}
+
+
+def test_save_config_skips_unchanged_payload(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    _use_temp_config(monkeypatch, tmp_path)
+    config.save_config({"value": 1})
+
+    replaced = []
+    real_replace = os.replace
+
+    def _tracking_replace(src: str, dst: str) -> None:
+        replaced.append(dst)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", _tracking_replace)
+
+    config.save_config({"value": 1})
+    assert replaced == []
+
+    config.save_config({"value": 2})
+    assert replaced == [config.CONFIG_PATH]
+
+
+def test_defaults_are_read_only(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    _use_temp_config(monkeypatch, tmp_path)
+
+    with pytest.raises(TypeError):
+        config.DEFAULTS["font_size"] = 1
+
+    loaded = config.load_config()
+    loaded["font_size"] = 1
+    assert config.DEFAULTS["font_size"] == 16
@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from fimpad.app import _DaemonWorkers
+
+
+def test_daemon_workers_run_tasks_without_blocking_exit():
+    workers = _DaemonWorkers(1, "test")
+    done = threading.Event()
+    workers.submit(done.set)
+
+    assert done.wait(1)
+    assert all(t.daemon for t in threading.enumerate() if t.name.startswith("test-"))
+    workers.shutdown()
+
+
+def test_daemon_workers_report_errors_and_keep_running(monkeypatch: pytest.MonkeyPatch):
+    reported = []
+    monkeypatch.setattr(threading, "excepthook", reported.append)
+
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    workers = _DaemonWorkers(1, "failing")
+    done = threading.Event()
+    workers.submit(fail)
+    workers.submit(done.set)
+
+    assert done.wait(1)
+    workers.shutdown()
+    assert len(reported) == 1
+    assert reported[0].exc_type is RuntimeError
+    assert str(reported[0].exc_value) == "boom"
+    assert reported[0].thread.name == "failing-0"
@@ -1,3 +1,8 @@
+from types import SimpleNamespace
+
+import pytest
+
+from fimpad.app import FIMPad
 from fimpad.library_resources import iter_library
 
 
@@ -12,3 +17,30 @@ def test_library_entries_keep_extensions():
 
     fimpad_titles = {title for title, _ in library.get("FIMpad", [])}
     assert "Shortcuts.md" in fimpad_titles
+
+
+def test_library_scan_is_cached():
+    iter_library.cache_clear()
+    first = iter_library()
+
+    assert iter_library() is first
+    assert all(isinstance(entries, tuple) for entries in first.values())
+    with pytest.raises(TypeError):
+        first[None] = ()
+
+    iter_library.cache_clear()
+    assert iter_library() is not first
+
+
+def test_open_library_resource_normalizes_newlines(tmp_path):
+    resource = tmp_path / "notes.md"
+    resource.write_bytes(b"one\r\ntwo\rthree\n")
+    opened = {}
+    dummy_app = SimpleNamespace(
+        _new_tab=lambda content, title: opened.update(content=content, title=title),
+        _current_tab_state=lambda: None,
+    )
+
+    FIMPad._open_library_resource(dummy_app, "notes.md", resource)
+
+    assert opened == {"content": "one\ntwo\nthree\n", "title": "notes.md"}
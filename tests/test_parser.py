@@ -66,6 +66,8 @@ def test_parse_triple_tokens_classifies_tag_types_and_reconstructs():
         "font_family": "TkDefaultFont",
         "bg": "#ffffff",
     }
+    with pytest.raises(TypeError):
+        config_token.tag.settings["bg"] = "#000000"
 
 
 def test_uppercase_prefix_suffix_tags_are_hard_by_default():
@@ -222,6 +224,18 @@ def test_missing_semicolon_after_fim_count_rejected():
         list(parse_triple_tokens("[[[5 stop('cut')]]]"))
 
 
+@pytest.mark.parametrize("body", [";;5", "; ;5"])
+def test_leading_separators_before_fim_count_are_skipped(body):
+    fim_token = _collect_tags(f"[[[{body}]]]")[0]
+
+    assert fim_token.tag == FIMTag(max_tokens=5, functions=())
+
+
+def test_leading_separator_before_multi_digit_count_rejected():
+    with pytest.raises(TagParseError, match="require semicolons"):
+        list(parse_triple_tokens("[[[;12]]]"))
+
+
 def test_string_literal_outside_function_rejected():
     with pytest.raises(TagParseError):
         list(parse_triple_tokens("[[[5; \"alpha\"]]]"))
@@ -234,6 +248,13 @@ def test_string_args_allow_internal_whitespace():
     assert fim_token.tag.functions[0].args == (" forth",)
 
 
+def test_string_args_keep_internal_commas():
+    fim_token = _collect_tags("[[[50; stop(\"a,b\", 'c'); chop(x, y)]]]")[0]
+
+    assert fim_token.tag.functions[0].args == ("a,b", "c")
+    assert fim_token.tag.functions[1].args == ("x", "y")
+
+
 def test_implicit_string_stop_rejected():
     with pytest.raises(TagParseError):
         list(parse_triple_tokens("[[[100'User: ']]]"))
@@ -463,3 +484,29 @@ def test_treasure_island_sample_has_single_valid_fim_tag():
 
     fim_request = parse_fim_request(content, marker.start + 1, tokens=tokens)
     assert isinstance(fim_request, FIMRequest)
+
+
+def test_parse_triple_tokens_reuses_parsed_tag_bodies():
+    first = _collect_tags("[[[12; stop('x')]]]")[0]
+    second = _collect_tags("text [[[12; stop('x')]]]")[0]
+
+    assert first.tag is second.tag
+    assert first.tag == FIMTag(
+        max_tokens=12, functions=(FIMFunction(name="stop", args=("x",), phase="init"),)
+    )
+
+
+def test_parse_triple_tokens_reuses_functions_across_tag_bodies():
+    first = _collect_tags("[[[12; stop('x')]]]")[0]
+    second = _collect_tags("[[[40; stop('x'); append('!')]]]")[0]
+
+    assert first.tag.functions[0] is second.tag.functions[0]
+
+
+def test_parse_triple_tokens_reuses_tokens_for_unchanged_content():
+    content = "alpha [[[prefix]]] beta [[[5]]] gamma"
+
+    first = list(parse_triple_tokens(content))
+    second = list(parse_triple_tokens("".join(["alpha [[[prefix]]] ", "beta [[[5]]] gamma"])))
+
+    assert all(a is b for a, b in zip(first, second, strict=True))
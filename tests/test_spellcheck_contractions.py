@@ -102,15 +102,9 @@ class DummyScrollableText:
         self.removed = (args, kwargs)
 
 
-class ImmediateThread:
-    def __init__(self, target=None, args=(), kwargs=None, daemon=None):
-        self._target = target
-        self._args = args
-        self._kwargs = kwargs or {}
-
-    def start(self):
-        if self._target is not None:
-            self._target(*self._args, **self._kwargs)
+class ImmediateExecutor:
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
 
 
 class FakeDict:
@@ -134,16 +128,15 @@ def _make_dummy_app(text, *, dictionary=None):
     dummy_app.cfg = {"spell_lang": "en_US", "spellcheck_enabled": True}
     dummy_app._spell_ignore = set()
     dummy_app.nb = SimpleNamespace(select=lambda: dummy_frame)
+    dummy_app._spell_pool = ImmediateExecutor()
     dummy_app._dictionary = dictionary
     return dummy_app, dummy_frame
 
 
-def test_spellcheck_handles_contractions(monkeypatch):
+def test_spellcheck_handles_contractions():
     text = "I couldn't believe she shouldn't be here."
     dummy_app, dummy_frame = _make_dummy_app(text, dictionary=FakeDict())
 
-    monkeypatch.setattr("fimpad.app.threading.Thread", ImmediateThread)
-
     FIMPad._spawn_spellcheck(dummy_app, dummy_frame)
 
     output = dummy_app._result_queue.get_nowait()
@@ -156,13 +149,11 @@ def test_spellcheck_handles_contractions(monkeypatch):
     assert "shouldn" not in words
 
 
-def test_spellcheck_marks_misspellings(monkeypatch):
+def test_spellcheck_marks_misspellings():
     text = "Good wurd here"
     fake_dict = FakeDict(misspelled={"wurd"})
     dummy_app, dummy_frame = _make_dummy_app(text, dictionary=fake_dict)
 
-    monkeypatch.setattr("fimpad.app.threading.Thread", ImmediateThread)
-
     FIMPad._spawn_spellcheck(dummy_app, dummy_frame)
 
     output = dummy_app._result_queue.get_nowait()
@@ -224,3 +215,25 @@ def test_spell_region_respects_char_budget():
     assert end_idx == "1.100"
     assert base_line == 1
     assert base_col == 0
+
+
+def test_spell_ranges_cached_until_invalidated():
+    calls = []
+
+    class RangesText:
+        def tag_ranges(self, tag):
+            calls.append(tag)
+            return ("1.5", "1.9", "2.10", "2.14")
+
+    st = {"text": RangesText(), "_spell_ranges": None}
+
+    starts, ranges = FIMPad._spell_ranges(st)
+    assert starts == [(1, 5), (2, 10)]
+    assert ranges == [("1.5", "1.9"), ("2.10", "2.14")]
+
+    FIMPad._spell_ranges(st)
+    assert calls == ["misspelled"]
+
+    st["_spell_ranges"] = None
+    FIMPad._spell_ranges(st)
+    assert calls == ["misspelled", "misspelled"]